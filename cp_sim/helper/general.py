@@ -6,7 +6,7 @@
 """
 
 # Libraries
-import numpy as np, math, os
+import numpy as np, pandas as pd, csv, itertools, math, os
 
 def transpose(list_of_lists:list) -> list:
     """
@@ -30,10 +30,29 @@ def round_sf(value:float, sf:int) -> float:
 
     Returns the rounded number
     """
-    format_str = "{:." + str(sf) + "g}"
-    rounded_value = float(format_str.format(value))
+    value = float(value)
+    if value == 0 or not math.isfinite(value):
+        return value
+    try:
+        rounded_value = round(value, sf - 1 - math.floor(math.log10(abs(value))))
+    except OverflowError: # rounds past the largest float
+        rounded_value = math.copysign(math.inf, value)
     return rounded_value
 
+def round_sf_list(value_list:list, sf:int) -> list:
+    """
+    Rounds a list of floats to a number of significant figures
+
+    Parameters:
+    * `value_list`: The list of values to be rounded
+    * `sf`:         The number of significant figures
+
+    Returns the list of rounded numbers
+    """
+    value_array = np.array(value_list, dtype=float)
+    rounded_list = [round_sf(value, sf) for value in value_array.ravel().tolist()]
+    return np.reshape(rounded_list, value_array.shape).tolist()
+
 def dict_to_csv(data_dict:dict, csv_path:str, include_header:bool=True) -> None:
     """
     Converts a dictionary to a CSV file
@@ -45,89 +64,97 @@ def dict_to_csv(data_dict:dict, csv_path:str, include_header:bool=True) -> None:
     """
     
     # Extract and check headers
-    headers = data_dict.keys()
+    headers = list(data_dict.keys())
     if len(headers) == 0:
         return
 
-    # Turn all values into lists
-    for header in headers:
-        if not isinstance(data_dict[header], list):
-            data_dict[header] = [data_dict[header]]
+    # Turn all values into columns (without modifying the dictionary)
+    column_list = [value if isinstance(value, (list, tuple, np.ndarray)) else [value]
+                   for value in data_dict.values()]
     
     # Open CSV file and write headers
-    csv_fh = open(csv_path, "w+")
-    if include_header:
-        csv_fh.write(",".join(headers) + "\n")
+    with open(csv_path, "w+", newline="") as csv_fh:
+        csv_writer = csv.writer(csv_fh, lineterminator="\n")
+        if include_header:
+            csv_writer.writerow(headers)
     
-    # Write data and close
-    max_list_size = max([len(data_dict[header]) for header in headers])
-    for i in range(max_list_size):
-        row_list = [str(data_dict[header][i]) if i < len(data_dict[header]) else "" for header in headers]
-        row_str = ",".join(row_list)
-        csv_fh.write(row_str + "\n")
-    csv_fh.close()
+        # Write data (pads shorter columns with empty cells)
+        csv_writer.writerows(itertools.zip_longest(*column_list, fillvalue=""))
 
-def csv_to_dict(csv_path:str, delimeter:str=",") -> dict:
+def parse_value(value:str):
+    """
+    Parses a value from a CSV cell into a float if possible
+
+    Parameters:
+    * `value`: The value of the cell
+
+    Returns the float (including `nan` and `inf`) or the value as a string
+    """
+    try:
+        return float(str(value))
+    except ValueError:
+        return str(value)
+
+def csv_to_dict(csv_path:str, delimeter:str=",", headers:list=None, as_arrays:bool=False) -> dict:
     """
     Converts a CSV file into a dictionary
     
     Parameters:
     * `csv_path`:  The path to the CSV file
     * `delimeter`: The separating character
+    * `headers`:   The headers of the columns to read (missing headers are
+                   ignored); if undefined, reads all the columns
+    * `as_arrays`: Whether to keep the columns as unboxed numpy arrays
+                   instead of converting them to lists
     
     Returns the dictionary
     """
 
-    # Read all data from CSV (assume that file is not too big)
-    csv_fh = open(csv_path, "r")
-    csv_lines = csv_fh.readlines()
-    csv_fh.close()
+    # Read the (selected) data from the memory-mapped CSV into typed columns
+    usecols = None if headers == None else lambda header: header in headers
+    data_frame = pd.read_csv(csv_path, sep=delimeter, usecols=usecols, keep_default_na=False, na_values=[""],
+                             float_precision="round_trip", memory_map=True)
+    headers = list(data_frame.columns)
 
-    # Initialisation for conversion
+    # Convert to dict (empty cells are skipped and single item lists become items)
     csv_dict = {}
-    headers = csv_lines[0].replace("\n", "").split(delimeter)
-    csv_lines = csv_lines[1:]
-    for header in headers:
-        csv_dict[header] = []
-
-    # Start conversion to dict
-    for csv_line in csv_lines:
-        csv_line_list = csv_line.replace("\n", "").split(delimeter)
-        for i in range(len(headers)):
-            value = csv_line_list[i]
-            if value == "":
-                continue
-            try:
-                value = float(value)
-            except:
-                pass
-            csv_dict[headers[i]].append(value)
-    
-    # Convert single item lists to items and things multi-item lists
     for header in headers:
-        if len(csv_dict[header]) == 1:
-            csv_dict[header] = csv_dict[header][0]
+        column = data_frame[header].dropna()
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            column = column.astype(float)
+        else:
+            column = column.map(parse_value, na_action="ignore").infer_objects()
+        value_list = column.to_numpy() if as_arrays else column.tolist()
+        csv_dict[header] = value_list[0] if len(value_list) == 1 else value_list
     
     # Return
     return csv_dict
 
-def get_sorted(value_list:list, reverse:bool=True) -> tuple:
+def get_sorted(value_list:list, reverse:bool=True, num_values:int=None) -> tuple:
     """
     Gets the top values and indexes of a list of values
     
     Parameters:
     * `value_list`: The list of values
+    * `reverse`:    Whether to sort in descending order
+    * `num_values`: The number of top values to get; if undefined, gets all
+                    the values
     
     Returns the list of top values and indexes
     """
-    sorted_value_list = sorted(value_list, reverse=reverse)
-    sorted_index_list = []
-    for value in sorted_value_list:
-        for i in range(len(value_list)):
-            if value == value_list[i] and not i in sorted_index_list:
-                sorted_index_list.append(i)
-                break
-    return sorted_value_list, sorted_index_list
+    if num_values != None and num_values <= 0:
+        return [], []
+    value_array = np.array(value_list)
+    sort_array = -value_array if reverse else value_array
+    if num_values == None or num_values >= len(value_array):
+        index_array = np.argsort(sort_array, kind="stable")
+    else:
+        kth_value = np.partition(sort_array, num_values-1)[num_values-1]
+        below_array = np.flatnonzero(sort_array < kth_value)
+        equal_array = np.flatnonzero(sort_array == kth_value)[:num_values-len(below_array)]
+        index_array = np.concatenate((below_array, equal_array))
+        index_array = index_array[np.argsort(sort_array[index_array], kind="stable")]
+    return value_array[index_array].tolist(), index_array.tolist()
 
 def transpose(list_of_lists:list) -> list:
     """
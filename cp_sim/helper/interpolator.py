@@ -26,8 +26,9 @@ class Interpolator:
         x_list, indices = np.unique(np.array(x_list), return_index=True)
         y_list = np.array(y_list)[indices]
         if len(x_list) > resolution:
-            x_list = get_thinned_list(list(x_list), resolution)
-            y_list = get_thinned_list(list(y_list), resolution)
+            thin_indexes = get_thinned_list(range(len(x_list)), resolution)
+            x_list = x_list[thin_indexes]
+            y_list = y_list[thin_indexes]
         smooth_amount = resolution if smooth else 0
         self.spl = splrep(x_list, y_list, s=smooth_amount)
 
@@ -40,5 +41,5 @@ class Interpolator:
 
         Returns the evaluated values
         """
-        return list(splev(x_list, self.spl))
+        return splev(x_list, self.spl).tolist()
 
@@ -12,7 +12,9 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from neml.math import rotations, tensors
 from neml.cp import crystallography
-from cp_sim.helper.general import flatten
+
+# Contraction of the transformation, lattice symmetry, orientation, sample symmetry, and direction
+PROJECTION_SUBSCRIPTS = "ij,ljk,tkm,smn,n->tsli"
 
 # Pole figure class
 class PF:
@@ -30,22 +32,24 @@ class PF:
         self.lattice = lattice
         sample_symmetry_str = "".join([str(ss) for ss in sample_symmetry])
         self.sample_symmetry = crystallography.symmetry_rotations(sample_symmetry_str)
+        self.sample_matrices = np.stack([rotation.to_matrix() for rotation in self.sample_symmetry])
         self.x_direction = [float(x) for x in x_direction]
         self.y_direction = [float(y) for y in y_direction]
+        self.standard_matrix = rotations.Orientation(tensors.Vector(self.x_direction), tensors.Vector(self.y_direction)).to_matrix()
 
-    def get_equivalent_poles(self, plane:list) -> list:
+    def get_equivalent_poles(self, plane:list) -> np.array:
         """
         Gets the equivalent poles
 
         Parameters:
         * `plane`: Plane of the projection
 
-        Returns the list of equivalent poles
+        Returns the (M,3) array of equivalent poles
         """
         poles = self.lattice.miller2cart_direction(plane)
         eq_poles = self.lattice.equivalent_vectors(poles)
-        eq_poles = [pole.normalize() for pole in eq_poles]
-        eq_poles = [op.apply(p) for p in eq_poles for op in self.sample_symmetry]
+        eq_poles = np.array([pole.normalize().data for pole in eq_poles])
+        eq_poles = np.einsum("sij,pj->psi", self.sample_matrices, eq_poles).reshape(-1, 3)
         return eq_poles
 
     def initialise_polar_grid(self) -> plt.Axes:
@@ -60,22 +64,22 @@ class PF:
         plt.xticks([0, np.pi/2], ["  RD", "TD"], fontsize=15)
         return axis
 
-    def get_polar_points(self, euler:list, eq_poles:list) -> list:
+    def get_polar_points(self, euler:list, eq_poles:np.array) -> list:
         """
         Converts the euler-bunge angles into polar points
         
         Parameters:
         * `euler`:    Orientation in euler-bunge angles (rads)
-        * `eq_poles`: List of equivalent poles
+        * `eq_poles`: Array of equivalent poles
 
         Returns the list of polar points
         """
-        standard_rotation = rotations.Orientation(tensors.Vector(self.x_direction), tensors.Vector(self.y_direction))
         orientation = rotations.CrystalOrientation(euler[0], euler[1], euler[2], angle_type="radians", convention="bunge")
-        points = [standard_rotation.apply(orientation.inverse().apply(pp)) for pp in eq_poles]
-        points = [point for point in points if point[2] >= 0.0] # rid of points in the lower hemisphere
-        cart_points = np.array([project_stereographic(v) for v in points])
-        polar_points = np.array([cart2pol(cp) for cp in cart_points])
+        rotation_matrix = self.standard_matrix @ orientation.inverse().to_matrix()
+        points = eq_poles @ rotation_matrix.T
+        points = points[points[:,2] >= 0.0] # rid of points in the lower hemisphere
+        cart_points = project_stereographic(points)
+        polar_points = cart2pol(cart_points)
         return polar_points
 
     def plot_pf(self, euler_list:list, plane:list, colour_list:list=None, size_list:list=None) -> None:
@@ -117,11 +121,13 @@ class PF:
         """
         eq_poles = self.get_equivalent_poles(plane)
         self.initialise_polar_grid()
-        radius_list, theta_list = [], [] 
+        radius_chunks, theta_chunks = [], []
         for euler in euler_list:
             polar_points = self.get_polar_points(euler, eq_poles)
-            radius_list += list(polar_points[:,0])
-            theta_list += list(polar_points[:,1])
+            radius_chunks.append(polar_points[:,0])
+            theta_chunks.append(polar_points[:,1])
+        radius_list = np.concatenate(radius_chunks)
+        theta_list = np.concatenate(theta_chunks)
         sns.kdeplot(x=radius_list, y=theta_list, cmap="viridis", levels=5, thresh=0)
 
 # Inverse pole figure class
@@ -140,11 +146,51 @@ class IPF:
         self.lattice = lattice
         sample_symmetry_str = "".join([str(ss) for ss in sample_symmetry])
         self.sample_symmetry = crystallography.symmetry_rotations(sample_symmetry_str)
+        self.sample_matrices = np.stack([rotation.to_matrix() for rotation in self.sample_symmetry])
+        self.lattice_matrices = np.stack([op.to_matrix() for op in self.lattice.symmetry.ops])
         self.vectors = (np.array([0,0,1.0]), np.array([1.0,0,1]), np.array([1.0,1,1])) # force float
         self.norm_vectors = [vector / np.linalg.norm(np.array(vector)) for vector in self.vectors]
+        self.tri_normals = np.stack([np.cross(self.norm_vectors[i], self.norm_vectors[j]) for i, j in ((0,1), (1,2), (2,0))])
         self.x_direction = [int(x) for x in x_direction]
         self.y_direction = [int(y) for y in y_direction]
 
+        # Normalise lattice directions
+        norm_x = self.lattice.miller2cart_direction(self.x_direction).normalize()
+        norm_y = self.lattice.miller2cart_direction(self.y_direction).normalize()
+        if not np.isclose(norm_x.dot(norm_y), 0.0):
+            raise ValueError("Lattice directions are not orthogonal!")
+        norm_z = norm_x.cross(norm_y)
+        self.trans_matrix = rotations.Orientation(np.vstack((norm_x.data, norm_y.data, norm_z.data))).to_matrix()
+        self.norm_directions = {}
+        self.projection_paths = {}
+
+    def get_projections(self, matrices:np.array, direction:list) -> np.array:
+        """
+        Projects a single sample direction onto a batch of crystals
+
+        Parameters:
+        * `matrices`:  The (T,3,3) array of orientation matrices
+        * `direction`: Direction of the projection
+
+        Returns the (T,S*L,3) array of projected points for every sample (S)
+        and lattice (L) symmetry operation
+        """
+
+        # Normalise the direction (reused across calls)
+        direction_key = tuple(direction)
+        if not direction_key in self.norm_directions:
+            self.norm_directions[direction_key] = tensors.Vector(np.array(direction)).normalize().data
+        norm_d = self.norm_directions[direction_key]
+
+        # Find the contraction order once for each batch size
+        operands = (self.trans_matrix, self.lattice_matrices, matrices, self.sample_matrices, norm_d)
+        if not len(matrices) in self.projection_paths:
+            self.projection_paths[len(matrices)] = np.einsum_path(PROJECTION_SUBSCRIPTS, *operands, optimize="optimal")[0]
+
+        # Populate the points for every sample and lattice symmetry operation at once
+        points_list = np.einsum(PROJECTION_SUBSCRIPTS, *operands, optimize=self.projection_paths[len(matrices)])
+        return points_list.reshape(len(matrices), -1, 3)
+
     def project_ipf(self, quaternion:np.array, direction:list) -> None:
         """
         Projects a single sample direction onto a crystal
@@ -155,30 +201,11 @@ class IPF:
 
         Returns the projected points
         """
-
-        # Normalise lattice directions
-        norm_x  = self.lattice.miller2cart_direction(self.x_direction).normalize()
-        norm_y  = self.lattice.miller2cart_direction(self.y_direction).normalize()
-        if not np.isclose(norm_x.dot(norm_y), 0.0):
-            raise ValueError("Lattice directions are not orthogonal!")
-        norm_z = norm_x.cross(norm_y)
-        trans  = rotations.Orientation(np.vstack((norm_x.data, norm_y.data, norm_z.data)))
-        norm_d = tensors.Vector(np.array(direction)).normalize()
-
-        # Populate the points
-        points_list = []
-        for rotation in self.sample_symmetry:
-            sample_points = rotation.apply(norm_d)
-            crystal_points = quaternion.apply(sample_points)
-            points = [trans.apply(op.apply(crystal_points)).data for op in self.lattice.symmetry.ops]
-            points_list += points
-
-        # Format the points in the upper hemisphere and return
-        points_list = np.array(points_list)
+        points_list = self.get_projections(quaternion.to_matrix()[np.newaxis], direction)[0]
         points_list = points_list[points_list[:,2] > 0]
         return points_list
 
-    def reduce_points_triangle(self, points:tuple) -> list:
+    def reduce_points_triangle(self, points:tuple) -> np.array:
         """
         Reduce points to a standard stereographic triangle
 
@@ -187,10 +214,9 @@ class IPF:
         
         Returns the reduced points
         """
-        norm_0 = np.cross(self.norm_vectors[0], self.norm_vectors[1])
-        norm_1 = np.cross(self.norm_vectors[1], self.norm_vectors[2])
-        norm_2 = np.cross(self.norm_vectors[2], self.norm_vectors[0])
-        reduced_points = [p for p in points if np.dot(p, norm_0) >= 0 and np.dot(p, norm_1) >= 0 and np.dot(p, norm_2) >= 0]
+        points = np.asarray(points).reshape(-1, 3)
+        in_triangle = (points @ self.tri_normals.T >= 0).all(axis=1)
+        reduced_points = points[in_triangle]
         return reduced_points
 
     def initialise_ipf(self) -> plt.Axes:
@@ -209,8 +235,8 @@ class IPF:
         # Create the grid
         for i,j in ((0,1), (1,2), (2,0)):
             fs = np.linspace(0, 1, 100)
-            points = np.array([project_stereographic((f*self.vectors[i]+(1-f)*self.vectors[j]) / 
-                                                          np.linalg.norm(f*self.vectors[i]+(1-f)*self.vectors[j])) for f in fs])
+            vectors = np.outer(fs, self.vectors[i]) + np.outer(1-fs, self.vectors[j])
+            points = project_stereographic(vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
             plt.plot(points[:,0], points[:,1], color="k", linewidth=1)
 
         # Returns the axis
@@ -230,7 +256,26 @@ class IPF:
         projected_points = self.project_ipf(orientation, direction)
         projected_points = np.vstack(tuple(projected_points))
         reduced_points = self.reduce_points_triangle(projected_points)
-        stereo_points  = np.array([project_stereographic(point) for point in reduced_points])
+        stereo_points  = project_stereographic(reduced_points)
+        return stereo_points
+
+    def get_points_batch(self, euler_list:list, direction:list) -> np.array:
+        """
+        Converts a list of euler orientations into stereo points, projecting
+        all the orientations at once
+
+        Parameters:
+        * `euler_list`: The list of orientations in euler-bunge form (rads)
+        * `direction`:  Direction of the projection
+
+        Returns an array of stereo points, ordered by orientation
+        """
+        matrices = np.stack([rotations.CrystalOrientation(euler[0], euler[1], euler[2], angle_type="radians",
+                             convention="bunge").to_matrix() for euler in euler_list])
+        projected_points = self.get_projections(matrices, direction).reshape(-1, 3)
+        projected_points = projected_points[projected_points[:,2] > 0]
+        reduced_points = self.reduce_points_triangle(projected_points)
+        stereo_points  = project_stereographic(reduced_points)
         return stereo_points
 
     def plot_ipf(self, euler_list:list, direction:list, colour_list:list=None, size_list:list=None) -> None:
@@ -273,7 +318,7 @@ class IPF:
         """
         axis = self.initialise_ipf()
         for trajectory in trajectories:
-            points = np.array(flatten([self.get_points(euler, direction) for euler in trajectory]))
+            points = self.get_points_batch(trajectory, direction)
             if function == "arrow": # experimental
                 axis.arrow(points[-3,0], points[-3,1], points[-1,0]-points[-3,0], points[-1,1]-points[-3,1], **settings)
             elif function == "text":
@@ -299,14 +344,18 @@ def get_colours(orientations:list, values:list) -> list:
     if len(values) != len(orientations):
         raise ValueError("The 'colour_list' does not have the same number of values as the quaternions!")
     
-    # Normalise values
-    norm_values = np.array(values)
-    norm_values = (norm_values - min(norm_values)) / (max(norm_values) - min(norm_values))
+    # Normalise values (constant values take the middle colour)
+    norm_values = np.array(values, dtype=float)
+    value_range = np.ptp(norm_values)
+    if value_range > 0:
+        norm_values = (norm_values - norm_values.min()) / value_range
+    else:
+        norm_values = np.full_like(norm_values, 0.5)
     
     # Define colours and return
     colour_map = plt.get_cmap("coolwarm")
-    colours = [colour_map(norm_value) for norm_value in norm_values]
-    return np.array(colours)
+    colours = colour_map(norm_values)
+    return colours
 
 def get_sizes(orientations:list, values:list) -> list:
     """
@@ -331,25 +380,27 @@ def get_sizes(orientations:list, values:list) -> list:
 
 def project_stereographic(vector:np.array) -> np.array:
     """
-    Stereographic projection of the given vector into a numpy array
+    Stereographic projection of the given vector(s) into a numpy array
 
     Parameters:
-    * `vector`: Unprojected vector
+    * `vector`: Unprojected vector, or an (N,3) array of unprojected vectors
     
-    Returns the projected vector
+    Returns the projected vector(s)
     """
-    return np.array([vector[0]/(1.0+vector[2]), vector[1]/(1.0+vector[2])])
+    vector = np.asarray(vector)
+    return np.stack([vector[...,0]/(1.0+vector[...,2]), vector[...,1]/(1.0+vector[...,2])], axis=-1)
 
 def cart2pol(cart_point:np.array):
     """
-    Convert a cartesian point into polar coordinates
+    Convert cartesian point(s) into polar coordinates
 
     Parameters:
-    * `cart_point`: Cartesian point
+    * `cart_point`: Cartesian point, or an (N,2) array of cartesian points
 
     Returns the polar coordinates
     """
-    return np.array([np.arctan2(cart_point[1], cart_point[0]), np.linalg.norm(cart_point)])
+    cart_point = np.asarray(cart_point)
+    return np.stack([np.arctan2(cart_point[...,1], cart_point[...,0]), np.hypot(cart_point[...,0], cart_point[...,1])], axis=-1)
 
 def normalise(value_list:list, min_norm:float=1.0, max_norm:list=32.0) -> list:
     """
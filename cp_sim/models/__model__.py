@@ -6,8 +6,9 @@
 """
 
 # Libraries
-import importlib, inspect, os, pathlib, sys
-import threading
+import importlib, inspect, os, pathlib, sys, threading, time
+import multiprocessing
+from multiprocessing import connection
 
 # The Model Template Class
 class __Model__:
@@ -33,38 +34,134 @@ class __Model__:
         param_names = list(model_params.keys())
         return param_names
 
-    def run(self, param_dict:dict, max_time:float=1e5) -> str:
+    def run(self, param_dict:dict, max_time:float=1e5, processor=None) -> str:
         """
-        Calls the run_model function using a thread with timeout;
-        also does extra processingg
+        Calls the run_model function with timeout; also does extra processingg
         
         Parameters:
         * `param_dict`: The parameters for the model as a dictionary
         * `max_time`:   The maximum time to run the model in seconds
+        * `processor`:  Function to process the output of run_model inside a
+                        separate process; the processed output must be
+                        picklable; if undefined, the model is run in a thread
+                        and the unprocessed output is stored
 
         Returns the running status
         """
 
-        # Creates a thread to run the model
-        thread = threading.Thread(target=self.__run__, kwargs=param_dict)
-        thread.start()
-        thread.join(timeout=max_time)
+        # Run in a thread if the output cannot be sent back from a process
+        if processor == None:
+            self.output = None
+            thread = threading.Thread(target=self.__run_thread__, kwargs=param_dict)
+            thread.start()
+            thread.join(timeout=max_time)
+            if thread.is_alive():
+                return "timeout"
+            return "failed" if self.output is None else "success"
 
-        # Returns the status
-        if thread.is_alive():
-            return "timeout"
-        if self.output == None:
-            return "failed"
-        return "success"
+        # Otherwise, run in a separate process
+        status, self.output = next(self.run_all([param_dict], max_time, 1, processor))
+        return status
 
-    def __run__(self, **params) -> tuple:
+    def run_all(self, param_dict_list:list, max_time:float=1e5, num_processes:int=1, processor=None):
         """
-        Calls the implemented run_model function with a try and stores the outputs
+        Calls the run_model function for a list of parameters, using a pool of
+        processes; processes that exceed the maximum time are terminated
+        
+        Parameters:
+        * `param_dict_list`: The list of parameter dictionaries
+        * `max_time`:        The maximum time to run each model in seconds
+        * `num_processes`:   The number of models to run at the same time
+        * `processor`:       Function to process the output of run_model inside
+                             the process; the processed output must be picklable
+
+        Yields the running status and output for each parameter dictionary,
+        in the order of the parameter dictionaries
+        """
+
+        # Check inputs (the outputs of run_model cannot be sent between processes)
+        if processor == None:
+            raise ValueError("A processor must be defined to run models in separate processes!")
+        if num_processes < 1:
+            raise ValueError("The number of processes must be at least 1!")
+
+        # Initialise (NEML objects cannot be pickled, so the processes are forked)
+        context = multiprocessing.get_context("fork")
+        pending_list = list(enumerate(param_dict_list))
+        running_dict = {}
+        finished_dict = {}
+        next_index = 0
+
+        # Run until all the models have finished (terminating the remaining
+        # models if the caller stops early or raises)
+        try:
+            while len(pending_list) > 0 or len(running_dict) > 0:
+
+                # Start models until all the processes are used
+                while len(pending_list) > 0 and len(running_dict) < num_processes:
+                    index, param_dict = pending_list.pop(0)
+                    receiver, sender = context.Pipe(duplex=False)
+                    process = context.Process(target=self.__run__, args=(sender, processor), kwargs=param_dict, daemon=True)
+                    process.start()
+                    sender.close()
+                    running_dict[receiver] = (index, process, time.time() + max_time)
+
+                # Wait for a model to finish or the earliest timeout
+                wait_time = min([deadline for _, _, deadline in running_dict.values()]) - time.time()
+                ready_list = connection.wait(list(running_dict.keys()), timeout=max(wait_time, 0))
+
+                # Collect the outputs of the finished models and terminate the timed out models
+                for receiver in list(running_dict.keys()):
+                    index, process, deadline = running_dict[receiver]
+                    if receiver in ready_list:
+                        try:
+                            output = receiver.recv()
+                        except EOFError:
+                            output = None
+                        status = "failed" if output is None else "success"
+                    elif time.time() >= deadline:
+                        process.terminate()
+                        status, output = "timeout", None
+                    else:
+                        continue
+                    process.join()
+                    receiver.close()
+                    del running_dict[receiver]
+                    finished_dict[index] = (status, output)
+
+                # Returns the statuses in order
+                while next_index in finished_dict:
+                    yield finished_dict.pop(next_index)
+                    next_index += 1
+        finally:
+            for receiver, (_, process, _) in running_dict.items():
+                process.terminate()
+                process.join()
+                receiver.close()
+
+    def __run__(self, sender, processor=None, **params) -> None:
+        """
+        Calls the implemented run_model function with a try and sends the outputs
         """
         try:
             output = self.run_model(**params)
-            self.output = output
-        except:
+            if processor != None:
+                output = processor(output)
+        except Exception:
+            output = None
+        try:
+            sender.send(output)
+        except Exception:
+            sender.send(None)
+        sender.close()
+
+    def __run_thread__(self, **params) -> None:
+        """
+        Calls the implemented run_model function with a try and stores the outputs
+        """
+        try:
+            self.output = self.run_model(**params)
+        except Exception:
             self.output = None
 
     def get_output(self) -> tuple:
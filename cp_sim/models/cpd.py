@@ -36,6 +36,7 @@ class Model(__Model__):
         self.strain_rate  = strain_rate
         self.max_strain   = max_strain
         self.e_model      = elasticity.IsotropicLinearElasticModel(youngs, "youngs", poissons, "poissons")
+        self.dm_model     = crystaldamage.WorkPlaneDamage()
         
     def run_model(self, tau_sat:float, b:float, tau_0:float, gamma_0:float, n:float, cd:float, beta:float) -> tuple:
         """
@@ -55,9 +56,8 @@ class Model(__Model__):
         str_model  = slipharden.VoceSlipHardening(tau_sat, b, tau_0)
         slip_model = sliprules.PowerLawSlipRule(str_model, gamma_0, n)
         i_model    = inelasticity.AsaroInelasticity(slip_model)
-        dm_model   = crystaldamage.WorkPlaneDamage()
         dm_func    = crystaldamage.SigmoidTransformation(cd, beta)
-        dm_planar  = crystaldamage.PlanarDamageModel(dm_model, dm_func, dm_func, self.lattice)
+        dm_planar  = crystaldamage.PlanarDamageModel(self.dm_model, dm_func, dm_func, self.lattice)
         dm_k_model = kinematics.DamagedStandardKinematicModel(self.e_model, i_model, dm_planar)
         sc_model   = singlecrystal.SingleCrystalModel(dm_k_model, self.lattice, miter=16, max_divide=2, verbose=False)
         pc_model   = polycrystal.TaylorModel(sc_model, self.orientations, nthreads=self.num_threads, weights=self.weights) # problem
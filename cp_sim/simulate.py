@@ -6,12 +6,15 @@
 """
 
 # Libraries
-import itertools, math, numpy as np
+import itertools, math, os, numpy as np
 from neml.math import rotations
 from neml.cp import crystallography
-from cp_sim.helper.general import round_sf
+from cp_sim.helper.general import round_sf_list
 from cp_sim.models.__model__ import create_model, __Model__
 
+# Parsed grain files, keyed by path and modification time
+GRAIN_STATS_CACHE = {}
+
 def get_combinations(params_dict:dict) -> list:
     """
     Returns a list of possible combinations of a set of parameters
@@ -56,6 +59,21 @@ def get_lattice(structure:str="fcc") -> crystallography.Lattice:
         raise ValueError(f"Crystal structure '{structure}' unsupported!")
     return lattice
 
+def get_grain_stats(csv_path:str) -> np.ndarray:
+    """
+    Given a path to a CSV file, loads the grain information; the file is
+    only parsed once unless it is modified
+
+    Parameters:
+    * `csv_path`: Path to CSV file of grain information
+
+    Returns the grain information as an array
+    """
+    cache_key = (os.path.abspath(csv_path), os.path.getmtime(csv_path))
+    if not cache_key in GRAIN_STATS_CACHE:
+        GRAIN_STATS_CACHE[cache_key] = np.loadtxt(csv_path, delimiter=",", ndmin=2)
+    return GRAIN_STATS_CACHE[cache_key]
+
 def get_orientations(csv_path:str, angle_type:str="radians", is_passive:bool=False) -> list:
     """
     Given a path to a CSV file, loads the euler-bunge orientations (rads)
@@ -69,7 +87,7 @@ def get_orientations(csv_path:str, angle_type:str="radians", is_passive:bool=Fal
     """
 
     # Get euler-bunge angles from file
-    grain_stats = np.loadtxt(csv_path, delimiter=",")
+    grain_stats = get_grain_stats(csv_path)
     eulers = [gs[:3] for gs in grain_stats]
 
     # Convert to active rotations if passive
@@ -89,7 +107,7 @@ def get_weights(csv_path:str) -> list:
 
     Returns the list of weight values
     """
-    grain_stats = np.loadtxt(csv_path, delimiter=",")
+    grain_stats = get_grain_stats(csv_path)
     weights = [gs[3] for gs in grain_stats]
     return weights
 
@@ -107,26 +125,28 @@ def reorient(euler:list) -> list:
     new_euler = inverse.to_euler(angle_type="radians", convention="bunge")
     return new_euler
 
-def get_orientation_history(pc_model:dict, results:dict, inverse:bool=True) -> list:
+def get_orientation_history(pc_model:dict, results:dict, inverse:bool=True, index_list:list=None) -> list:
     """
     Gets the orientation history in euler-bunge form (rads)
 
     Parameters:
-    * `pc_model`: The polycrystal model
-    * `results`:  The driver results
-    * `inverse`:  Whether to invert the orientations or not
+    * `pc_model`:   The polycrystal model
+    * `results`:    The driver results
+    * `inverse`:    Whether to invert the orientations or not
+    * `index_list`: The list of grain indexes to include (starts at 0), in
+                    the order they are returned; if undefined, includes all
+                    the grains
     
     Returns the orientation history
     """
-    history = np.array(results["history"])
     orientation_history = []
-    for state in history:
-        orientation_list = []
-        for orientation in pc_model.orientations(state):
-            euler = list(orientation.to_euler(angle_type="radians", convention="bunge"))
-            if inverse:
-                euler = reorient(euler)
-            orientation_list.append(euler)
+    for state in results["history"]: # iterate states directly rather than copying into one array
+        orientations = pc_model.orientations(state)
+        if index_list != None:
+            orientations = [orientations[i] for i in index_list]
+        if inverse:
+            orientations = [orientation.inverse() for orientation in orientations]
+        orientation_list = [list(orientation.to_euler(angle_type="radians", convention="bunge")) for orientation in orientations]
         orientation_history.append(orientation_list)
     return orientation_history
 
@@ -177,51 +197,51 @@ def get_grain_dict(strain_list:list, history:list, grain_ids:list) -> dict:
 
     Parameters:
     * `strain_list`: The list of strain values
-    * `history`:     The orientation history
+    * `history`:     The orientation history of the grains in `grain_ids`,
+                     in the same order as `grain_ids`
     * `grain_ids`:   The grain indexes to include in the dictionary (starts at 1)
     
     Returns the dictionary of euler-bunge angles (rads)
     """
 
-    # Reformat orientations
-    index_list = [grain_id-1 for grain_id in grain_ids] # starts at 0
-    trajectories = get_trajectories(history, index_list)
-
     # Initialise grain dictionary (20%, 40$, .., 100% of max strain)
     strain_intervals = ["0p2", "0p4", "0p6", "0p8", "1p0"]
+    euler_values     = ["phi_1", "Phi", "phi_2"]
     grain_dict = {"grain_id": grain_ids}
     for strain_interval in strain_intervals:
-        for euler_value in ["phi_1", "Phi", "phi_2"]:
+        for euler_value in euler_values:
             grain_dict[f"{strain_interval}_{euler_value}"] = []
     
     # Initialise orientation interpolation
-    domain = lambda x : round_sf(x, 5) if x>0 else round_sf(x+2*math.pi, 5)
+    domain = lambda x_list : np.array(round_sf_list(np.where(x_list>0, x_list, x_list+2*math.pi), 5))
     num_intervals = len(strain_intervals)
     max_strain    = max(strain_list)
-    strain_values = [max_strain*(i+1)/num_intervals for i in range(num_intervals)]
-
-    # Get orientations at different strain intervals
-    for trajectory in trajectories:
-
-        # Get orientations
-        phi_1_list = [domain(t[0]) for t in trajectory]
-        Phi_list   = [domain(t[1]) for t in trajectory]
-        phi_2_list = [domain(t[2]) for t in trajectory]
-        
-        # Calculate reduced orientations
-        reduced_phi_1_list = [quick_spline(strain_list, phi_1_list, strain) for strain in strain_values]
-        reduced_Phi_list   = [quick_spline(strain_list, Phi_list, strain)   for strain in strain_values]
-        reduced_phi_2_list = [quick_spline(strain_list, phi_2_list, strain) for strain in strain_values]
-        
-        # Check that the orientations are valid
-        if None in reduced_phi_1_list + reduced_Phi_list + reduced_phi_2_list:
-            return None
-
-        # Store reduced orientations
-        for i, strain_interval in enumerate(strain_intervals):
-            grain_dict[f"{strain_interval}_phi_1"].append(reduced_phi_1_list[i])
-            grain_dict[f"{strain_interval}_Phi"].append(reduced_Phi_list[i])
-            grain_dict[f"{strain_interval}_phi_2"].append(reduced_phi_2_list[i])
+    strain_values = np.array([max_strain*(i+1)/num_intervals for i in range(num_intervals)])
+
+    # Locate the strain segment containing each strain interval (shared by all grains)
+    euler_history = np.array(history, dtype=float).reshape(len(history), -1, 3)
+    if euler_history.shape[1] != len(grain_ids):
+        raise ValueError("The history must only contain the grains in grain_ids!")
+    if euler_history.shape[1] == 0:
+        return grain_dict
+    strain_array = np.array(strain_list, dtype=float)
+    in_segment = (strain_array[:-1,None] <= strain_values) & (strain_values <= strain_array[1:,None])
+    if len(strain_array) < 2 or not in_segment.any(axis=0).all():
+        return None
+    index_list = in_segment.argmax(axis=0)
+
+    # Interpolate only the orientations bounding each strain interval
+    x_lower = strain_array[index_list][:,None,None]
+    x_upper = strain_array[index_list+1][:,None,None]
+    y_lower = domain(euler_history[index_list])
+    y_upper = domain(euler_history[index_list+1])
+    gradient = (y_upper-y_lower)/(x_upper-x_lower)
+    reduced_grid = gradient*(strain_values[:,None,None]-x_lower) + y_lower
+
+    # Store reduced orientations
+    for i, strain_interval in enumerate(strain_intervals):
+        for j, euler_value in enumerate(euler_values):
+            grain_dict[f"{strain_interval}_{euler_value}"] = reduced_grid[i,:,j].tolist()
 
     # Return the dictionary
     return grain_dict
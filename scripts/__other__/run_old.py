@@ -45,12 +45,12 @@ model = sim.get_model(
 param_dict = {"tau_sat": 95, "b": 0.25, "tau_0": 820, "gamma_0": round_sf(STRAIN_RATE/3, 4), "n": 4.5}
 results_path = f"{RESULTS_PATH}/old"
 
-# Runs the model
-status = model.run(param_dict, max_time=MAX_TIME)
-if status != "success":
-    dict_to_csv(param_dict, f"{results_path}_{status}.csv")
+# Runs the model (in this process, as the NEML objects are used afterwards)
+try:
+    _, pc_model, results = model.run_model(**param_dict)
+except Exception:
+    dict_to_csv(param_dict, f"{results_path}_failed.csv")
     exit()
-_, pc_model, results = model.get_output()
 
 # Save final orientations (1)
 strain_list = [round_sf(s[0], 5) for s in results["strain"]]
@@ -6,10 +6,11 @@
 """
 
 # Libraries
-import os, math
+import os, math, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
 import sys; sys.path += ["../.."]
-from cp_sim.helper.general import csv_to_dict, dict_to_csv, round_sf
+from cp_sim.helper.general import csv_to_dict, round_sf_list
 from cp_sim.helper.interpolator import Interpolator
 
 # Constants
@@ -20,108 +21,148 @@ PARAM_NAME_LIST = ["tau_sat", "b", "tau_0", "gamma_0", "n"]
 STRAIN_HEADER   = "strain"
 STRESS_HEADER   = "stress"
 NUM_STRAINS     = 30
-
-def append_to_dict(list_dict:dict, key:str, value:float) -> dict:
+STRAIN_STEPS    = np.arange(NUM_STRAINS)
+PHI_LABEL_LIST  = [f"{strain_interval}_{phi}" for strain_interval in ["0p2", "0p4", "0p6", "0p8", "1p0"] for phi in ["phi_1", "Phi", "phi_2"]]
+USECOLS         = PARAM_NAME_LIST + [STRAIN_HEADER, STRESS_HEADER, "grain_id"] + PHI_LABEL_LIST
+TC_HEADER_LIST  = ["x_end"] + [f"y_{i+1}" for i in range(NUM_STRAINS)]
+NUM_PROCESSES   = os.cpu_count()
+CHUNK_SIZE      = 16
+
+def write_summary(data_frame:pd.DataFrame, csv_path:str) -> None:
     """
-    Appends a value to a dictionary;
-    if key doesn't exist, initialises a list for it
+    Writes a summary table to a CSV file (missing values are left empty)
 
     Parameters:
-    * `list_dict`: The dictionary
-    * `key`:      The key to add the value to
-    * `value`:    The value to append
+    * `data_frame`: The summary table
+    * `csv_path`:   The path that the CSV file will be written to
     """
-    if not key in list_dict.keys():
-        list_dict[key] = []
-    list_dict[key].append(value)
-    return list_dict
+    if len(data_frame.columns) == 0:
+        return
+    data_frame.to_csv(csv_path, index=False, lineterminator="\n")
 
-def append_list_dict(list_dict:dict, value_dict:dict) -> dict:
+def summarise_file(csv_file:str) -> tuple:
     """
-    Appends values from a dictionary to lists in another dictionary;
-    if key doesn't exist, initialises a list for it
-    
+    Reads and summarises the results of a single simulation
+
     Parameters:
-    * `list_dict`:  The dictionary of lists
-    * `value_dict`: The dictionary of values
+    * `csv_file`: The name of the CSV file in the sample directory
 
-    Returns the new dictionary
+    Returns the parameter dictionary, the reason the simulation was
+    rejected (or None), and the summarised results (or None)
     """
-    for key in value_dict.keys():
-        append_to_dict(list_dict, key, value_dict[key])
-    return list_dict
-
-# Initialise summary dictionaries
-sum_tc_dict = {}
-sum_phi_dict = {}
-sum_fail_dict = {}
-
-# Initialise plot
-plt.figure(figsize=(6,6))
-
-# Iterate through CSV files
-csv_file_list = [file for file in os.listdir(SAMPLE_PATH) if file.endswith(".csv")]
-for csv_file in csv_file_list:
-    
+
+    # Check whether the simulation failed or timed out (only needs the parameters)
+    for keyword in ["failed", "timeout", "unoriented"]:
+        if keyword in csv_file:
+            param_dict = csv_to_dict(f"{SAMPLE_PATH}/{csv_file}", headers=PARAM_NAME_LIST)
+            return param_dict, keyword, None
+
     # Convert csv file to dictionary
-    data_dict = csv_to_dict(f"{SAMPLE_PATH}/{csv_file}")
+    data_dict = csv_to_dict(f"{SAMPLE_PATH}/{csv_file}", headers=USECOLS, as_arrays=True)
 
     # Get parameter informationn
     param_dict = {}
     for param_name in PARAM_NAME_LIST:
         param_dict[param_name] = data_dict[param_name]
 
-    # Check whether the simulation failed or timed out
-    failed = False
-    for keyword in ["failed", "timeout", "unoriented"]:
-        if keyword in csv_file:
-            sum_fail_dict = append_list_dict(sum_fail_dict, param_dict)
-            sum_fail_dict = append_to_dict(sum_fail_dict, "reason", keyword)
-            failed = True
-    if failed:
-        continue
-
     # Check whether the number of datapoints are sufficient
     if len(data_dict["strain"]) < 5:
-        sum_fail_dict = append_list_dict(sum_fail_dict, param_dict) 
-        sum_fail_dict = append_to_dict(sum_fail_dict, "reason", "insufficient")
-        continue
+        return param_dict, "insufficient", None
 
-    # Add parameter information
-    sum_tc_dict = append_list_dict(sum_tc_dict, param_dict)
-    sum_phi_dict = append_list_dict(sum_phi_dict, param_dict)
-
-    # Add to tensile curve dictionary
+    # Sample the tensile curve
     interpolator = Interpolator(data_dict[STRAIN_HEADER], data_dict[STRESS_HEADER], resolution=100)
-    x_end  = max(data_dict[STRAIN_HEADER])
-    x_list = [x_end/(NUM_STRAINS-1)*j for j in range(NUM_STRAINS)]
+    x_end  = data_dict[STRAIN_HEADER].max()
+    x_list = x_end/(NUM_STRAINS-1)*STRAIN_STEPS
     y_list = interpolator.evaluate(x_list)
-    sum_tc_dict = append_to_dict(sum_tc_dict, "x_end", round_sf(x_end, 5))
-    for i in range(NUM_STRAINS):
-        sum_tc_dict = append_to_dict(sum_tc_dict, f"y_{i+1}", round_sf(y_list[i], 5))
-
-    # Add to orientation dictionary
-    for i, grain_id in enumerate(data_dict["grain_id"]):
-        for strain_interval in ["0p2", "0p4", "0p6", "0p8", "1p0"]:
-            for phi in ["phi_1", "Phi", "phi_2"]:
-                label = f"{strain_interval}_{phi}"
-                value = data_dict[label][i]
-                value = round_sf(value if value > 0 else value + 2*math.pi, 5)
-                sum_phi_dict = append_to_dict(sum_phi_dict, f"g{int(grain_id)}_{label}", value)
-
-    # Plot tensile curves
-    plt.scatter(data_dict[STRAIN_HEADER], data_dict[STRESS_HEADER], color="silver")
-    plt.plot(x_list, y_list)
-
-# Write results
-dict_to_csv(sum_fail_dict, f"{RESULTS_DIR}/{SUMMARY_ID}_fail.csv")
-dict_to_csv(sum_tc_dict,   f"{RESULTS_DIR}/{SUMMARY_ID}_tc.csv")
-dict_to_csv(sum_phi_dict,  f"{RESULTS_DIR}/{SUMMARY_ID}_phi.csv")
-
-# Format and save plot for tensile curves
-plt.xlim(0.0, 0.3)
-plt.ylim(0.0, None)
-plt.xlabel("Strain (mm/mm)", fontsize=12)
-plt.ylabel("Stress (MPa)", fontsize=12)
-plt.savefig(f"{RESULTS_DIR}/tc_plot.png")
-plt.clf()
\ No newline at end of file
+
+    # Shift and round all the orientations at once
+    phi_grid = np.array([data_dict[label] for label in PHI_LABEL_LIST])
+    phi_grid = round_sf_list(np.where(phi_grid > 0, phi_grid, phi_grid + 2*math.pi), 5)
+
+    # Return the summary
+    summary = {
+        "strain":   data_dict[STRAIN_HEADER],
+        "stress":   data_dict[STRESS_HEADER],
+        "x_end":    x_end,
+        "x_list":   x_list,
+        "y_list":   y_list,
+        "grain_id": data_dict["grain_id"],
+        "phi_grid": phi_grid,
+    }
+    return param_dict, None, summary
+
+def main() -> None:
+    """
+    Summarises the simulation runs in the sample directory
+    """
+
+    # Initialise summary records
+    tc_record_list = []
+    phi_record_list = []
+    fail_record_list = []
+    phi_key_dict = {} # orientation headers for each grain
+
+    # Initialise plot
+    plt.figure(figsize=(6,6))
+
+    # Get CSV files and preallocate the tensile curve grid (x_end and sampled stresses)
+    with os.scandir(SAMPLE_PATH) as entries:
+        csv_file_list = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".csv")]
+    tc_grid = np.empty((len(csv_file_list), NUM_STRAINS+1))
+    num_tc = 0
+
+    # Summarise the CSV files in parallel
+    with ProcessPoolExecutor(max_workers=NUM_PROCESSES) as executor:
+        for param_dict, reason, summary in executor.map(summarise_file, csv_file_list, chunksize=CHUNK_SIZE):
+
+            # Record rejected simulations
+            if reason != None:
+                fail_record_list.append({**param_dict, "reason": reason})
+                continue
+
+            # Add parameter information
+            tc_record_list.append(param_dict)
+
+            # Add to tensile curve grid
+            tc_grid[num_tc,0]  = summary["x_end"]
+            tc_grid[num_tc,1:] = summary["y_list"]
+            num_tc += 1
+
+            # Add to orientation records
+            phi_record = dict(param_dict)
+            for grain_id, phi_list in zip(summary["grain_id"], np.transpose(summary["phi_grid"])):
+                if not grain_id in phi_key_dict:
+                    phi_key_dict[grain_id] = [f"g{int(grain_id)}_{label}" for label in PHI_LABEL_LIST]
+                phi_record.update(zip(phi_key_dict[grain_id], phi_list))
+            phi_record_list.append(phi_record)
+
+            # Plot tensile curves
+            plt.scatter(summary["strain"], summary["stress"], color="silver")
+            plt.plot(summary["x_list"], summary["y_list"])
+
+    # Combine the records into summary tables
+    sum_tc_frame   = pd.DataFrame(tc_record_list)
+    sum_phi_frame  = pd.DataFrame(phi_record_list)
+    sum_fail_frame = pd.DataFrame(fail_record_list)
+
+    # Round the tensile curves of all the simulations at once
+    if num_tc > 0:
+        tc_grid = np.array(round_sf_list(tc_grid[:num_tc], 5))
+        sum_tc_frame = pd.concat([sum_tc_frame, pd.DataFrame(tc_grid, columns=TC_HEADER_LIST)], axis=1)
+
+    # Write results
+    write_summary(sum_fail_frame, f"{RESULTS_DIR}/{SUMMARY_ID}_fail.csv")
+    write_summary(sum_tc_frame,   f"{RESULTS_DIR}/{SUMMARY_ID}_tc.csv")
+    write_summary(sum_phi_frame,  f"{RESULTS_DIR}/{SUMMARY_ID}_phi.csv")
+
+    # Format and save plot for tensile curves
+    plt.xlim(0.0, 0.3)
+    plt.ylim(0.0, None)
+    plt.xlabel("Strain (mm/mm)", fontsize=12)
+    plt.ylabel("Stress (MPa)", fontsize=12)
+    plt.savefig(f"{RESULTS_DIR}/tc_plot.png")
+    plt.clf()
+
+# Only run the summary in the main process
+if __name__ == "__main__":
+    main()
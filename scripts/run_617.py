@@ -8,7 +8,7 @@
 # Libraries
 import sys; sys.path += [".."]
 import cp_sim.simulate as sim 
-from cp_sim.helper.general import csv_to_dict, round_sf, get_thinned_list, transpose
+from cp_sim.helper.general import csv_to_dict, round_sf, round_sf_list, get_thinned_list, transpose
 from cp_sim.io.pole_figure import IPF
 from cp_sim.io.plotter import Plotter, define_legend, save_plot
 
@@ -43,16 +43,29 @@ model = sim.get_model(
     poissons     = 0.3,
 )
 
+def process_output(output:tuple) -> tuple:
+    """
+    Extracts the simulation results from the model output; runs inside
+    the model's process, so only picklable results are returned
+
+    Parameters:
+    * `output`: The single crystal model, polycrystal model, and driver results
+
+    Returns the strain list, stress list, and orientation history
+    """
+    _, pc_model, results = output # active to passive
+    strain_list = round_sf_list([s[0] for s in results["strain"]], 5)
+    stress_list = round_sf_list([s[0] for s in results["stress"]], 5)
+    history     = sim.get_orientation_history(pc_model, results, inverse=False, index_list=[grain_id-1 for grain_id in grain_ids]) # passive
+    return strain_list, stress_list, history
+
 # Run the model
 param_dict = {"tau_sat": 108.35, "b": 0.5840, "tau_0": 120.21, "gamma_0": round_sf(STRAIN_RATE/3, 4), "n": 2.5832}
-status = model.run(param_dict, max_time=MAX_TIME)
-_, pc_model, results = model.get_output() # active to passive
+status = model.run(param_dict, max_time=MAX_TIME, processor=process_output)
 
 # Get simulation results
-sim_strain_list  = [round_sf(s[0], 5) for s in results["strain"]]
-sim_stress_list  = [round_sf(s[0], 5) for s in results["stress"]]
-sim_history      = sim.get_orientation_history(pc_model, results, inverse=False) # passive
-sim_trajectories = sim.get_trajectories(sim_history, [grain_id-1 for grain_id in grain_ids])
+sim_strain_list, sim_stress_list, sim_history = model.get_output()
+sim_trajectories = sim.get_trajectories(sim_history)
 sim_dict = {"strain": get_thinned_list(sim_strain_list, THIN_AMOUNT), "stress": get_thinned_list(sim_stress_list, THIN_AMOUNT)}
 
 # Plot stress-strain curve
@@ -6,9 +6,10 @@
 """
 
 # Libraries
+import os
 import sys; sys.path += [".."]
 import cp_sim.simulate as sim 
-from cp_sim.helper.general import csv_to_dict, dict_to_csv, round_sf, get_thinned_list
+from cp_sim.helper.general import csv_to_dict, dict_to_csv, round_sf, round_sf_list, get_thinned_list
 
 # Paths
 EXP_PATH     = f"data/p91_s3_exp.csv"
@@ -16,7 +17,8 @@ GRAINS_PATH  = f"data/p91_s3_grains.csv"
 RESULTS_PATH = "results"
 
 # Constants
-NUM_THREADS = 12
+NUM_WORKERS = 4
+NUM_THREADS = max(1, os.cpu_count()//NUM_WORKERS)
 STRAIN_RATE = 1e-4
 MAX_STRAIN  = 0.3
 MAX_TIME    = 1800 # seconds
@@ -50,32 +52,46 @@ all_params_dict = {
     "n":       [1, 2, 4, 8, 16, 32],
 }
 
-# Iterate through the parameters
-param_combinations = sim.get_combinations(all_params_dict)
-param_names = list(all_params_dict.keys())
-for i, combination in enumerate(param_combinations):
-
-    # Initialise
-    index_str = str(i+1).zfill(3)
-    param_dict = dict(zip(param_names, combination))
-    results_path = f"{RESULTS_PATH}/{index_1}_{index_2}_{index_str}"
+def process_output(output:tuple) -> tuple:
+    """
+    Extracts the results from the model output; runs inside the model's
+    process, so only picklable results are returned
 
-    # Runs the model
-    status = model.run(param_dict, max_time=MAX_TIME)
-    if status != "success":
-        dict_to_csv(param_dict, f"{results_path}_{status}.csv")
-        continue
-    _, pc_model, results = model.get_output() # active to passive
+    Parameters:
+    * `output`: The single crystal model, polycrystal model, and driver results
 
-    # Process results
-    strain_list = [round_sf(s[0], 5) for s in results["strain"]]
-    stress_list = [round_sf(s[0], 5) for s in results["stress"]]
+    Returns the dictionary of stress-strain data and the dictionary of
+    grain orientations (none if the orientations are invalid)
+    """
+    _, pc_model, results = output # active to passive
+    strain_list = round_sf_list([s[0] for s in results["strain"]], 5)
+    stress_list = round_sf_list([s[0] for s in results["stress"]], 5)
     data_dict   = {"strain": get_thinned_list(strain_list, THIN_AMOUNT), "stress": get_thinned_list(stress_list, THIN_AMOUNT)}
-    history     = sim.get_orientation_history(pc_model, results, inverse=False) # passive
+    index_list  = [grain_id-1 for grain_id in grain_ids]
+    history     = sim.get_orientation_history(pc_model, results, inverse=False, index_list=index_list) # passive
     grain_dict  = sim.get_grain_dict(strain_list, history, grain_ids)
+    return data_dict, grain_dict
+
+# Iterate through the parameters
+if __name__ == "__main__":
+    param_combinations = sim.get_combinations(all_params_dict)
+    param_names = list(all_params_dict.keys())
+    param_dict_list = [dict(zip(param_names, combination)) for combination in param_combinations]
+    output_list = model.run_all(param_dict_list, max_time=MAX_TIME, num_processes=NUM_WORKERS, processor=process_output)
+    for i, (param_dict, (status, output)) in enumerate(zip(param_dict_list, output_list)):
+
+        # Initialise
+        index_str = str(i+1).zfill(3)
+        results_path = f"{RESULTS_PATH}/{index_1}_{index_2}_{index_str}"
+
+        # Check the status
+        if status != "success":
+            dict_to_csv(param_dict, f"{results_path}_{status}.csv")
+            continue
+        data_dict, grain_dict = output
 
-    # Check and save results
-    if grain_dict == None:
-        dict_to_csv(param_dict, f"{results_path}_unoriented.csv")
-        continue
-    dict_to_csv({**param_dict, **data_dict, **grain_dict}, f"{results_path}.csv")
+        # Check and save results
+        if grain_dict == None:
+            dict_to_csv(param_dict, f"{results_path}_unoriented.csv")
+            continue
+        dict_to_csv({**param_dict, **data_dict, **grain_dict}, f"{results_path}.csv")